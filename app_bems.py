@@ -1,29 +1,84 @@
 from flask import Flask, render_template, jsonify, request
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask.json.provider import JSONProvider
 from datetime import datetime
 import sqlite3
 import json
 import pytz
 import simulate_data
 import os
+import atexit
+import threading
+import time
+import orjson
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider that serializes API responses with orjson."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response, skipping the str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        return self._app.response_class(body, mimetype='application/json')
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Global monitoring flag
 MONITORING_ENABLED = True
 
-# Individual room monitoring status (all rooms ON by default)
-ROOM_MONITORING = {}
+# Individual room monitoring status as a bitmask, one bit per room (set = ON)
+ROOM_BIT = {}
+ROOM_MONITORING_MASK = 0
+ROOM_MONITORING_LOCK = threading.Lock()
 
 # Bangladesh timezone
 BD_TZ = pytz.timezone('Asia/Dhaka')
 
+# Background recording interval
+RECORD_INTERVAL = 60  # seconds
+RECORDER_STOP = threading.Event()
+
+# SQLite database file
+DB_PATH = 'energy_bems.db'
+
+# Long-lived writer connection used by the background recorder
+WRITE_CONN = None
+WRITE_LOCK = threading.Lock()
+
+# Insert statement for recorded readings; kept constant so the writer
+# connection's statement cache reuses the prepared statement every tick
+INSERT_READING_SQL = '''
+    INSERT INTO energy_readings 
+    (room_id, timestamp, power, current, voltage, kwh, is_scheduled, course, status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
 # Database setup
+def configure_connection(conn):
+    """Apply per-connection SQLite performance settings."""
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA mmap_size=268435456')  # 256 MB
+    conn.execute('PRAGMA cache_size=-65536')  # 64 MB
+
+
 def init_database():
     """Initialize SQLite database."""
-    conn = sqlite3.connect('energy_bems.db')
+    conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
     
+    # WAL mode is stored in the database file, so it only needs setting once
+    cursor.execute('PRAGMA journal_mode=WAL')
+    configure_connection(conn)
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS energy_readings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -39,16 +94,39 @@ def init_database():
         )
     ''')
     
+    # Index for per-room history lookups (latest readings first)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_room_ts
+        ON energy_readings (room_id, timestamp DESC)
+    ''')
+    
     conn.commit()
     conn.close()
 
 
+def init_write_connection():
+    """Open the shared writer connection used by record_building_data."""
+    global WRITE_CONN
+    WRITE_CONN = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    configure_connection(WRITE_CONN)
+
+
 def init_room_monitoring():
     """Initialize room monitoring status - all rooms ON by default."""
-    global ROOM_MONITORING
-    for room_id in simulate_data.ROOM_CONFIG.keys():
-        ROOM_MONITORING[room_id] = True  # True = monitoring ON
-    print(f"✓ Initialized monitoring for {len(ROOM_MONITORING)} rooms (all ON)")
+    global ROOM_BIT, ROOM_MONITORING_MASK
+    ROOM_BIT = {room_id: 1 << i for i, room_id in enumerate(simulate_data.ROOM_IDS)}
+    ROOM_MONITORING_MASK = (1 << len(ROOM_BIT)) - 1  # All bits set = all rooms ON
+    print(f"✓ Initialized monitoring for {monitored_room_count()} rooms (all ON)")
+
+
+def is_room_monitored(room_id):
+    """Check if monitoring is enabled for a room."""
+    return bool(ROOM_MONITORING_MASK & ROOM_BIT[room_id])
+
+
+def monitored_room_count():
+    """Count rooms with monitoring enabled."""
+    return ROOM_MONITORING_MASK.bit_count()
 
 
 def record_building_data():
@@ -61,27 +139,22 @@ def record_building_data():
         return
     
     try:
-        conn = sqlite3.connect('energy_bems.db')
-        cursor = conn.cursor()
-        
         current_time = datetime.now(BD_TZ)
         building_summary = simulate_data.get_building_summary(current_time)
         
         total_power = 0
+        timestamp_iso = building_summary['timestamp']  # already formatted once for this tick
+        rows = []
         
         for room in building_summary['rooms']:
             # Only record if room monitoring is enabled
-            if ROOM_MONITORING.get(room['room_id'], True):
+            if is_room_monitored(room['room_id']):
                 # Calculate energy (kWh) - assume 1 hour interval
                 kwh = room['power'] / 1000.0
                 
-                cursor.execute('''
-                    INSERT INTO energy_readings 
-                    (room_id, timestamp, power, current, voltage, kwh, is_scheduled, course, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                rows.append((
                     room['room_id'],
-                    current_time.isoformat(),
+                    timestamp_iso,
                     room['power'],
                     room['current'],
                     room['voltage'],
@@ -93,25 +166,51 @@ def record_building_data():
                 
                 total_power += room['power']
         
-        conn.commit()
-        conn.close()
+        # Insert all readings for this tick in a single transaction
+        with WRITE_LOCK:
+            cursor = WRITE_CONN.cursor()
+            try:
+                cursor.execute('BEGIN IMMEDIATE')
+                cursor.executemany(INSERT_READING_SQL, rows)
+                cursor.execute('COMMIT')
+            except Exception:
+                if WRITE_CONN.in_transaction:
+                    cursor.execute('ROLLBACK')
+                raise
         
         timestamp_str = current_time.strftime('%H:%M:%S')
-        monitored_count = sum(1 for v in ROOM_MONITORING.values() if v)
-        print(f"✓ [{timestamp_str}] Recorded {monitored_count} rooms | Building: {int(total_power)}W")
+        print(f"✓ [{timestamp_str}] Recorded {monitored_room_count()} rooms | Building: {int(total_power)}W")
         
     except Exception as e:
         print(f"✗ Error recording data: {e}")
 
 
+def run_recorder():
+    """
+    Background loop calling record_building_data every RECORD_INTERVAL seconds.
+    Deadlines are tracked on the monotonic clock so ticks do not drift.
+    """
+    next_run = time.monotonic() + RECORD_INTERVAL
+    
+    while not RECORDER_STOP.wait(max(0, next_run - time.monotonic())):
+        record_building_data()
+        next_run += RECORD_INTERVAL
+        
+        # Skip missed ticks instead of firing them back to back
+        now = time.monotonic()
+        if next_run < now:
+            next_run = now + RECORD_INTERVAL
+
+
 # Initialize database and room monitoring
 init_database()
+init_write_connection()
 init_room_monitoring()
 
-# Setup background scheduler
-scheduler = BackgroundScheduler(timezone=BD_TZ)
-scheduler.add_job(func=record_building_data, trigger="interval", seconds=60)
-scheduler.start()
+# Start background data collection
+recorder = threading.Thread(target=run_recorder, name='bems-recorder', daemon=True)
+recorder.start()
+atexit.register(RECORDER_STOP.set)  # Stop the recorder loop on interpreter shutdown
 
 
 # ============= ROUTES =============
@@ -138,25 +237,28 @@ def get_building_status():
     try:
         summary = simulate_data.get_building_summary()
         
-        # Add room monitoring status to each room
-        for room in summary['rooms']:
-            room['monitoring_enabled'] = ROOM_MONITORING.get(room['room_id'], True)
+        # Add room monitoring status to per-request copies of each room;
+        # the summary may be the shared cached object, so it is never modified
+        rooms = [
+            dict(room, monitoring_enabled=is_room_monitored(room['room_id']))
+            for room in summary['rooms']
+        ]
         
         # Calculate ONLY rooms with monitoring enabled
         # Count rooms that are both active AND have monitoring enabled
         monitored_active_rooms = sum(
-            1 for room in summary['rooms'] 
-            if room['is_active'] and ROOM_MONITORING.get(room['room_id'], True)
+            1 for room in rooms 
+            if room['is_active'] and room['monitoring_enabled']
         )
         
         # Total rooms with monitoring enabled (regardless of active status)
-        total_monitored_rooms = sum(1 for v in ROOM_MONITORING.values() if v)
+        total_monitored_rooms = monitored_room_count()
         
         # Calculate daily energy and cost for the building
         total_daily_kwh = 0
         for room_id in simulate_data.ROOM_CONFIG.keys():
             # Only count energy for monitored rooms
-            if ROOM_MONITORING.get(room_id, True):
+            if is_room_monitored(room_id):
                 total_daily_kwh += simulate_data.calculate_daily_energy(room_id)
         
         total_daily_cost = total_daily_kwh * 8.5
@@ -173,7 +275,7 @@ def get_building_status():
             'daily_energy': round(total_daily_kwh, 2),
             'daily_cost': round(total_daily_cost, 2),
             'co2_saved': co2_saved,
-            'rooms': summary['rooms']
+            'rooms': rooms
         })
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -204,7 +306,7 @@ def get_room_status(room_id):
             'course_name': room_data['course_name'],
             'daily_energy': daily_kwh,
             'daily_cost': daily_cost,
-            'monitoring_enabled': ROOM_MONITORING.get(room_id, True),
+            'monitoring_enabled': is_room_monitored(room_id),
             'timestamp': room_data['timestamp']
         })
     except Exception as e:
@@ -307,23 +409,21 @@ def toggle_room_monitoring(room_id):
     """
     Toggle monitoring for a specific room.
     """
-    global ROOM_MONITORING
+    global ROOM_MONITORING_MASK
     
     try:
         if room_id not in simulate_data.ROOM_CONFIG:
             return jsonify({'success': False, 'error': 'Room not found'}), 404
         
-        # Toggle the room's monitoring status
-        current_status = ROOM_MONITORING.get(room_id, True)
-        ROOM_MONITORING[room_id] = not current_status
+        # Toggle the room's monitoring status and update the monitored count
+        with ROOM_MONITORING_LOCK:
+            ROOM_MONITORING_MASK ^= ROOM_BIT[room_id]
+            new_status = is_room_monitored(room_id)
+            monitored_count = monitored_room_count()
         
-        new_status = ROOM_MONITORING[room_id]
         status_text = "ON" if new_status else "OFF"
         icon = "✓" if new_status else "✗"
         
-        # Count how many rooms are currently being monitored
-        monitored_count = sum(1 for v in ROOM_MONITORING.values() if v)
-        
         print(f"{icon} Room {room_id} monitoring: {status_text} | Total monitored: {monitored_count}/40")
         
         return jsonify({
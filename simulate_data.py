@@ -1,6 +1,10 @@
 import json
 import random
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
 import pytz
 
 # Bangladesh timezone
@@ -22,8 +26,52 @@ LIGHT_FLUCTUATION = 0.05  # ±5% for lights
 DEVICE_FLUCTUATION = 0.10  # ±10% for PC/Projector
 RANDOM_NOISE = 20  # ±20W random noise
 
+# Random generator for batched (vectorized) simulations
+RNG = np.random.default_rng()
+
+# Equipment types, in the order used by ROOM_LOADS and RATED_POWER
+EQUIPMENT_TYPES = ('ac', 'fan', 'light', 'projector', 'pc')
+
+# Room IDs in a stable order, and the room_id -> index map into the tables below
+ROOM_IDS = list(ROOM_CONFIG.keys())
+ROOM_INDEX = {room_id: i for i, room_id in enumerate(ROOM_IDS)}
+
+# Rated power (wattage x count) per room, one tuple per room in EQUIPMENT_TYPES order
+ROOM_LOADS = tuple(
+    tuple(ROOM_CONFIG[r]['wattage'][e] * ROOM_CONFIG[r]['equipment'][e] for e in EQUIPMENT_TYPES)
+    for r in ROOM_IDS
+)
+
+# Standby power per room - 5% PC standby plus one light at 30%
+STANDBY_LOADS = tuple(
+    ROOM_CONFIG[r]['wattage']['pc'] * ROOM_CONFIG[r]['equipment']['pc'] * 0.05
+    + ROOM_CONFIG[r]['wattage']['light'] * 1 * 0.3
+    for r in ROOM_IDS
+)
+
+# Same tables as NumPy arrays for the vectorized simulations
+RATED_POWER = np.array(ROOM_LOADS, dtype=float)
+STANDBY_POWER = np.array(STANDBY_LOADS, dtype=float)
+
+# Fluctuation per equipment type (same order as EQUIPMENT_TYPES)
+EQUIPMENT_FLUCTUATION = np.array([
+    AC_FLUCTUATION, FAN_FLUCTUATION, LIGHT_FLUCTUATION, DEVICE_FLUCTUATION, DEVICE_FLUCTUATION
+])
+
+# Full active power per room (ALL equipment at rated power)
+ACTIVE_POWER = {r: sum(ROOM_LOADS[i]) for r, i in ROOM_INDEX.items()}
+
+# Daily energy (kWh) and cost (BDT) per room - 8 hours active, 16 hours at 5% standby
+DAILY_KWH = {r: round((p * 8 + p * 0.05 * 16) / 1000, 2) for r, p in ACTIVE_POWER.items()}
+DAILY_COST = {r: round(kwh * 8.5, 2) for r, kwh in DAILY_KWH.items()}
+
+# Short-lived cache so bursts of dashboard polls share one simulated tick
+SUMMARY_CACHE_TTL = 1.0  # seconds
+SUMMARY_CACHE = {'time': 0.0, 'value': None}
+SUMMARY_CACHE_LOCK = threading.Lock()
+
 # Randomly select 5-6 rooms to be offline (changes periodically)
-OFFLINE_ROOMS = []
+OFFLINE_ROOMS = frozenset()
 LAST_OFFLINE_UPDATE = None
 
 
@@ -40,9 +88,9 @@ def update_offline_rooms():
     if LAST_OFFLINE_UPDATE is None or (current_time - LAST_OFFLINE_UPDATE).total_seconds() > 600:
         all_room_ids = list(ROOM_CONFIG.keys())
         num_offline = random.randint(5, 6)
-        OFFLINE_ROOMS = random.sample(all_room_ids, num_offline)
+        OFFLINE_ROOMS = frozenset(random.sample(all_room_ids, num_offline))
         LAST_OFFLINE_UPDATE = current_time
-        print(f"🔄 Updated offline rooms: {OFFLINE_ROOMS}")
+        print(f"🔄 Updated offline rooms: {sorted(OFFLINE_ROOMS)}")
 
 
 def is_room_active(room_id):
@@ -51,15 +99,10 @@ def is_room_active(room_id):
     Returns True if class is active, False if room is offline.
     
     Logic: 34-35 rooms are online (occupied), 5-6 rooms offline (unoccupied)
+    Callers refresh the offline set with update_offline_rooms() first.
     """
-    update_offline_rooms()
-    
-    # If room is in offline list, it's not active
-    if room_id in OFFLINE_ROOMS:
-        return False
-    
-    # All other rooms are active (class in session)
-    return True
+    # Rooms in the offline set are not active, all others have class in session
+    return room_id not in OFFLINE_ROOMS
 
 
 def calculate_equipment_power(equipment_type, base_wattage, count):
@@ -86,34 +129,31 @@ def calculate_room_power(room_id, is_active):
     """
     Calculate total power consumption for a room with realistic fluctuations.
     """
-    config = ROOM_CONFIG[room_id]
-    equipment = config['equipment']
-    wattage = config['wattage']
+    room_index = ROOM_INDEX[room_id]
     
     if not is_active:
         # Offline room - only standby power for PC and minimal lighting
-        standby_power = wattage['pc'] * equipment['pc'] * 0.05  # 5% standby
-        standby_power += wattage['light'] * 1 * 0.3  # One light at 30%
         noise = random.uniform(-RANDOM_NOISE, RANDOM_NOISE)
-        return max(10, standby_power + noise)  # Minimum 10W
+        return max(10, STANDBY_LOADS[room_index] + noise)  # Minimum 10W
     
     # Active room - ALL equipment running at FULL POWER with fluctuations
+    ac, fan, light, projector, pc = ROOM_LOADS[room_index]
     total_power = 0
     
     # AC - Full power (most significant load)
-    total_power += calculate_equipment_power('ac', wattage['ac'], equipment['ac'])
+    total_power += calculate_equipment_power('ac', ac, 1)
     
     # Fans - All running
-    total_power += calculate_equipment_power('fan', wattage['fan'], equipment['fan'])
+    total_power += calculate_equipment_power('fan', fan, 1)
     
     # Lights - All on
-    total_power += calculate_equipment_power('light', wattage['light'], equipment['light'])
+    total_power += calculate_equipment_power('light', light, 1)
     
     # Projector - On during class
-    total_power += calculate_equipment_power('projector', wattage['projector'], equipment['projector'])
+    total_power += calculate_equipment_power('projector', projector, 1)
     
     # PC - On
-    total_power += calculate_equipment_power('pc', wattage['pc'], equipment['pc'])
+    total_power += calculate_equipment_power('pc', pc, 1)
     
     # Add random noise for realism
     noise = random.uniform(-RANDOM_NOISE, RANDOM_NOISE)
@@ -122,10 +162,36 @@ def calculate_room_power(room_id, is_active):
     return max(100, total_power)  # Minimum 100W for active room
 
 
+def simulate_readings(rated_power, standby_power, is_active):
+    """
+    Simulate power, current and voltage for a batch of readings at once.
+    Same model as calculate_room_power, using one NumPy draw per quantity.
+    rated_power and standby_power broadcast against the is_active array.
+    """
+    count = len(is_active)
+    
+    # Active rooms - ALL equipment at full power with fluctuations (min 100W)
+    variation = RNG.uniform(-1, 1, size=(count, len(EQUIPMENT_TYPES)))
+    active_power = (rated_power * (1 + EQUIPMENT_FLUCTUATION * variation)).sum(axis=1)
+    noise = RNG.uniform(-RANDOM_NOISE, RANDOM_NOISE, count)
+    
+    # Offline rooms - standby power only (min 10W)
+    power = np.where(
+        is_active,
+        np.maximum(100, active_power + noise),
+        np.maximum(10, standby_power + noise)
+    )
+    voltage = BASE_VOLTAGE + RNG.uniform(-VOLTAGE_VARIATION, VOLTAGE_VARIATION, count)
+    current = power / voltage
+    
+    return power, current, voltage
+
+
 def get_room_data(room_id, current_time=None):
     """
     Get current power data for a specific room.
     """
+    update_offline_rooms()
     is_active = is_room_active(room_id)
     
     # Calculate power
@@ -158,24 +224,60 @@ def get_room_data(room_id, current_time=None):
 def get_building_summary(current_time=None):
     """
     Get summary data for all 40 rooms in the building.
+    Without an explicit time, results are cached for SUMMARY_CACHE_TTL seconds.
     """
+    if current_time is not None:
+        return simulate_building_summary(current_time)
+    
+    with SUMMARY_CACHE_LOCK:
+        now = time.monotonic()
+        if SUMMARY_CACHE['value'] is not None and now - SUMMARY_CACHE['time'] < SUMMARY_CACHE_TTL:
+            return SUMMARY_CACHE['value']
+        
+        summary = simulate_building_summary()
+        SUMMARY_CACHE['time'] = now
+        SUMMARY_CACHE['value'] = summary
+        return summary
+
+
+def simulate_building_summary(current_time=None):
+    """
+    Simulate current data for all 40 rooms in the building.
+    Power for all rooms is simulated in one batch of NumPy draws.
+    """
+    update_offline_rooms()
+    is_active = np.array([is_room_active(room_id) for room_id in ROOM_IDS])
+    power, current, voltage = simulate_readings(RATED_POWER, STANDBY_POWER, is_active)
+    
+    timestamp = (current_time or datetime.now(BD_TZ)).isoformat()
     rooms = []
-    total_power = 0
-    active_count = 0
     
-    for room_id in ROOM_CONFIG.keys():
-        room_data = get_room_data(room_id, current_time)
-        rooms.append(room_data)
-        total_power += room_data['power']
-        if room_data['is_active']:
-            active_count += 1
+    for room_id, active, room_power, room_current, room_voltage in zip(
+        ROOM_IDS,
+        is_active.tolist(),
+        power.round(2).tolist(),
+        current.round(2).tolist(),
+        voltage.round(2).tolist()
+    ):
+        schedule = SCHEDULES.get(room_id)
+        rooms.append({
+            'room_id': room_id,
+            'power': room_power,
+            'current': room_current,
+            'voltage': room_voltage,
+            'is_active': active,
+            'status': 'ONLINE' if active else 'OFFLINE',
+            'course_code': schedule.get('course_code') if schedule else None,
+            'course_name': schedule.get('course_name') if schedule else None,
+            'timestamp': timestamp
+        })
     
     return {
         'rooms': rooms,
-        'total_power': round(total_power, 2),
-        'active_rooms': active_count,
+        'total_power': round(sum(room['power'] for room in rooms), 2),
+        'active_rooms': int(is_active.sum()),
         'total_rooms': len(ROOM_CONFIG),
-        'timestamp': (current_time or datetime.now(BD_TZ)).isoformat()
+        'timestamp': timestamp
     }
 
 
@@ -185,44 +287,56 @@ def generate_historical_data(room_id, hours=24):
     Used for charts on room detail page.
     """
     current_time = datetime.now(BD_TZ)
-    historical_data = []
+    room_index = ROOM_INDEX[room_id]
     
     # Generate data points (every 5 minutes for smoother charts)
     interval_minutes = 5
-    total_points = (hours * 60) // interval_minutes
-    
-    for i in range(total_points):
-        time_point = current_time - timedelta(minutes=interval_minutes * (total_points - i))
-        
-        # Randomly decide if room was active at that time (85% chance)
-        is_active = random.random() < 0.85
-        
-        # Calculate power
-        power = calculate_room_power(room_id, is_active)
-        voltage = BASE_VOLTAGE + random.uniform(-VOLTAGE_VARIATION, VOLTAGE_VARIATION)
-        current = power / voltage
-        
-        historical_data.append({
-            'timestamp': time_point.strftime('%Y-%m-%d %H:%M:%S'),
-            'power': round(power, 2),
-            'current': round(current, 2),
-            'voltage': round(voltage, 2),
-            'is_active': is_active
-        })
-    
-    return historical_data
+    total_points = max(0, (hours * 60) // interval_minutes)
+    
+    # Timestamps from (total_points x interval) ago up to one interval ago
+    end_time = np.datetime64(current_time.replace(tzinfo=None), 's')
+    offsets = np.arange(-total_points, 0) * interval_minutes
+    time_points = end_time + offsets.astype('timedelta64[m]')
+    timestamps = np.datetime_as_string(time_points, unit='s')
+    
+    # Randomly decide if room was active at each time (85% chance)
+    is_active = RNG.random(total_points) < 0.85
+    power, current, voltage = simulate_readings(
+        RATED_POWER[room_index], STANDBY_POWER[room_index], is_active
+    )
+    
+    return [
+        {
+            'timestamp': timestamp.replace('T', ' '),
+            'power': point_power,
+            'current': point_current,
+            'voltage': point_voltage,
+            'is_active': active
+        }
+        for timestamp, point_power, point_current, point_voltage, active in zip(
+            timestamps.tolist(),
+            power.round(2).tolist(),
+            current.round(2).tolist(),
+            voltage.round(2).tolist(),
+            is_active.tolist()
+        )
+    ]
 
 
+@lru_cache(maxsize=64)
 def get_room_config(room_id):
     """
     Get equipment configuration for a specific room.
+    The returned dict is shared - callers must not modify it.
     """
     return ROOM_CONFIG.get(room_id)
 
 
+@lru_cache(maxsize=64)
 def get_room_schedule(room_id):
     """
     Get weekly schedule for a specific room.
+    The returned dict is shared - callers must not modify it.
     """
     return SCHEDULES.get(room_id)
 
@@ -231,27 +345,9 @@ def calculate_daily_energy(room_id):
     """
     Calculate daily energy consumption (kWh) for a room.
     Estimates based on typical class schedule (8 hours active per day).
+    Values are precomputed at import in DAILY_KWH.
     """
-    config = ROOM_CONFIG[room_id]
-    equipment = config['equipment']
-    wattage = config['wattage']
-    
-    # Calculate average power when active (ALL equipment at full power)
-    active_power = 0
-    active_power += wattage['ac'] * equipment['ac']
-    active_power += wattage['fan'] * equipment['fan']
-    active_power += wattage['light'] * equipment['light']
-    active_power += wattage['projector'] * equipment['projector']
-    active_power += wattage['pc'] * equipment['pc']
-    
-    # Estimate 8 hours active, 16 hours standby per day
-    active_hours = 8
-    standby_hours = 16
-    standby_power = active_power * 0.05
-    
-    daily_kwh = (active_power * active_hours + standby_power * standby_hours) / 1000
-    
-    return round(daily_kwh, 2)
+    return DAILY_KWH[room_id]
 
 
 def calculate_daily_cost(room_id):
@@ -259,9 +355,7 @@ def calculate_daily_cost(room_id):
     Calculate daily electricity cost in BDT.
     Bangladesh rate: 8.5 BDT/kWh
     """
-    kwh = calculate_daily_energy(room_id)
-    cost = kwh * 8.5
-    return round(cost, 2)
+    return DAILY_COST[room_id]
 
 
 def calculate_co2_saved(kwh):